@@ -1,16 +1,37 @@
 import streamlit as st
 import numpy as np
 import time
-import matplotlib.pyplot as plt
-import seaborn as sns
-from .utils import calculate_sample_means, create_download_button
+from functools import partial
+from .utils import (calculate_sample_means, calculate_sample_means_progressive,
+                    create_download_button, hist_with_kde, session_figure, mark_tab_visited,
+                    RNG_SEED)
 
 
+def plot_normal_limit(ax, means: np.ndarray, edges: np.ndarray, color: str):
+    """Аналитическая кривая N(среднее, σ) поверх гистограммы частот: предел из ЦПТ вместо KDE"""
+    mu, sd = float(np.mean(means)), float(np.std(means))
+    if sd == 0:
+        return
+    xs = np.linspace(edges[0], edges[-1], 100)
+    pdf = np.exp(-0.5 * ((xs - mu) / sd) ** 2) / (sd * np.sqrt(2 * np.pi))
+    # Плотность масштабируется к частотам: n * ширина бина
+    ax.plot(xs, pdf * len(means) * (edges[1] - edges[0]), color=color, linewidth=2)
+
+
+def plot_sample_means(ax, means: np.ndarray, dist_type: str, sample_size: int, num_samples: int):
+    """Гистограмма выборочных средних с нормальным пределом"""
+    _, edges = hist_with_kde(ax, means, bins=30, kde=False, color="skyblue")
+    plot_normal_limit(ax, means, edges, color="skyblue")
+
+    ax.set_title(f"ЦПТ: Средние {num_samples} выборок ({dist_type}, n = {sample_size})", fontsize=14)
+    ax.set_xlabel("Среднее значение выборки")
+    ax.set_ylabel("Частота")
+
+
+@st.fragment
 def central_limit_theorem_tab():
     """Вкладка центральной предельной теоремы"""
-    if "visited_tabs" not in st.session_state:
-        st.session_state.visited_tabs = set()
-    st.session_state.visited_tabs.add("ЦПТ")
+    mark_tab_visited("ЦПТ")
 
     st.header("Центральная предельная теорема")
     st.markdown(
@@ -27,19 +48,16 @@ def central_limit_theorem_tab():
     with col3:
         num_samples = st.slider("Количество выборок", 100, 5000, 1000, step=100)
 
-    means = calculate_sample_means(dist_type, sample_size, num_samples)
-
-    fig, ax = plt.subplots(figsize=(12, 6))
-    sns.histplot(means, bins=30, kde=True, ax=ax, color="skyblue", edgecolor='black')
+    means = calculate_sample_means(dist_type, sample_size, num_samples, seed=RNG_SEED)
 
-    ax.set_title(f"ЦПТ: Средние {num_samples} выборок ({dist_type}, n = {sample_size})", fontsize=14)
-    ax.set_xlabel("Среднее значение выборки")
-    ax.set_ylabel("Частота")
+    fig, ax = session_figure("clt", (12, 6))
+    draw = partial(plot_sample_means, means=means, dist_type=dist_type,
+                   sample_size=sample_size, num_samples=num_samples)
+    draw(ax)
 
-    fig.tight_layout()
     st.pyplot(fig, use_container_width=True)
 
-    create_download_button(fig, "clt.png")
+    create_download_button(fig, "clt.png", cache_key=(dist_type, sample_size, num_samples), draw=draw)
 
     animate_clt = st.checkbox("Анимировать эффект увеличения размера выборки")
     if animate_clt:
@@ -57,8 +75,9 @@ def central_limit_theorem_tab():
     )
 
 
+@st.fragment
 def clt_animation_section(dist_type: str, num_samples: int):
-    """Раздел анимации ЦПТ"""
+    """Раздел анимации ЦПТ (фрагмент: его виджеты перезапускают только эту секцию)"""
     animation_container = st.container()
     chart_placeholder = animation_container.empty()
     info_placeholder = animation_container.empty()
@@ -69,17 +88,21 @@ def clt_animation_section(dist_type: str, num_samples: int):
     with col2:
         display_progress = st.checkbox("Показывать прогрессбар", value=True)
 
-    sample_sizes = [2, 5, 10, 20, 30, 50, 100]
+    sample_sizes = (2, 5, 10, 20, 30, 50, 100)
+    # Все кадры считаются заранее из одной матрицы выборок: в цикле остаётся только отрисовка
+    frames = calculate_sample_means_progressive(dist_type, num_samples, sample_sizes, seed=RNG_SEED)
     if display_progress:
         progress_bar = st.progress(0)
 
+    fig, ax = session_figure("clt_animation", (10, 5))
     for i, n in enumerate(sample_sizes):
         if display_progress:
             progress_bar.progress((i + 1) / len(sample_sizes))
 
-        means = calculate_sample_means(dist_type, n, num_samples)
-        fig, ax = plt.subplots(figsize=(10, 5))
-        sns.histplot(means, bins=30, kde=True, ax=ax, color="skyblue", edgecolor='black')
+        means = frames[n]
+        ax.cla()
+        _, edges = hist_with_kde(ax, means, bins=30, kde=False, color="skyblue")
+        plot_normal_limit(ax, means, edges, color="skyblue")
 
         ax.set_title(f"Распределение выборочных средних (n = {n})")
         ax.set_xlabel("Среднее значение выборки")
@@ -90,7 +113,6 @@ def clt_animation_section(dist_type: str, num_samples: int):
                    label=f'Среднее: {np.mean(means):.3f}, σ: {std_dev:.3f}')
         ax.legend()
 
-        fig.tight_layout()
         chart_placeholder.pyplot(fig)
 
         if n <= 10:
@@ -100,7 +122,6 @@ def clt_animation_section(dist_type: str, num_samples: int):
         else:
             info_placeholder.success(f"n = {n}: ЦПТ проявляется отчётливо!")
 
-        plt.close(fig)
         time.sleep(1 / animation_speed)
 
     if display_progress:
@@ -1,39 +1,59 @@
 import streamlit as st
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
 from typing import Tuple, Dict, Any
-from .utils import generate_distribution_data, safe_statistics, format_stat_display, create_download_button
+from .utils import (generate_distribution_data, safe_statistics, format_stat_display,
+                    create_download_button, hist_with_kde, new_figure, mark_tab_visited, RNG_SEED)
+
+
+def _build_normal(suffix: str) -> Dict[str, Any]:
+    return {
+        'mu': st.slider(f"Среднее μ ({suffix})", -10.0, 10.0, 0.0, key=f"mu_{suffix}"),
+        'sigma': st.slider(f"Стандартное отклонение σ ({suffix})", 0.1, 5.0, 1.0, key=f"sigma_{suffix}"),
+    }
+
+
+def _build_uniform(suffix: str) -> Dict[str, Any]:
+    a = st.slider(f"Минимум a ({suffix})", -10.0, 10.0, 0.0, key=f"a_{suffix}")
+    b = st.slider(f"Максимум b ({suffix})", a+0.1, a+20.0, a+1.0, key=f"b_{suffix}")
+    return {'a': a, 'b': b}
+
+
+def _build_exponential(suffix: str) -> Dict[str, Any]:
+    lam = st.slider(f"Лямбда λ ({suffix})", 0.1, 5.0, 1.0, key=f"lambda_{suffix}")
+    return {'scale': 1/lam}
+
+
+def _build_binomial(suffix: str) -> Dict[str, Any]:
+    return {
+        'n': st.slider(f"Количество испытаний n ({suffix})", 1, 100, 20, key=f"n_{suffix}"),
+        'p': st.slider(f"Вероятность успеха p ({suffix})", 0.0, 1.0, 0.5, key=f"p_{suffix}"),
+    }
+
+
+def _build_poisson(suffix: str) -> Dict[str, Any]:
+    return {'lam': st.slider(f"Интенсивность λ ({suffix})", 0.1, 20.0, 5.0, key=f"lam_{suffix}")}
+
+
+# Слайдеры параметров для каждого типа распределения
+_PARAM_BUILDERS = {
+    "Нормальное": _build_normal,
+    "Равномерное": _build_uniform,
+    "Экспоненциальное": _build_exponential,
+    "Биномиальное": _build_binomial,
+    "Пуассона": _build_poisson,
+}
 
 
 def distribution_selector(suffix: str) -> Tuple[str, Dict[str, Any]]:
     """Универсальный селектор параметров распределения"""
-    distributions = ["Нормальное", "Равномерное", "Экспоненциальное", "Биномиальное", "Пуассона"]
-    dist_type = st.selectbox(f"Тип распределения ({suffix})", distributions, key=f"dist_{suffix}")
-    params: Dict[str, Any] = {}
-
-    if dist_type == "Нормальное":
-        params['mu'] = st.slider(f"Среднее μ ({suffix})", -10.0, 10.0, 0.0, key=f"mu_{suffix}")
-        params['sigma'] = st.slider(f"Стандартное отклонение σ ({suffix})", 0.1, 5.0, 1.0, key=f"sigma_{suffix}")
-    elif dist_type == "Равномерное":
-        params['a'] = st.slider(f"Минимум a ({suffix})", -10.0, 10.0, 0.0, key=f"a_{suffix}")
-        params['b'] = st.slider(f"Максимум b ({suffix})", params['a']+0.1, params['a']+20.0, params['a']+1.0, key=f"b_{suffix}")
-    elif dist_type == "Экспоненциальное":
-        lam = st.slider(f"Лямбда λ ({suffix})", 0.1, 5.0, 1.0, key=f"lambda_{suffix}")
-        params['scale'] = 1/lam
-    elif dist_type == "Биномиальное":
-        params['n'] = st.slider(f"Количество испытаний n ({suffix})", 1, 100, 20, key=f"n_{suffix}")
-        params['p'] = st.slider(f"Вероятность успеха p ({suffix})", 0.0, 1.0, 0.5, key=f"p_{suffix}")
-    elif dist_type == "Пуассона":
-        params['lam'] = st.slider(f"Интенсивность λ ({suffix})", 0.1, 20.0, 5.0, key=f"lam_{suffix}")
-    return dist_type, params
+    dist_type = st.selectbox(f"Тип распределения ({suffix})", list(_PARAM_BUILDERS), key=f"dist_{suffix}")
+    return dist_type, _PARAM_BUILDERS[dist_type](suffix)
 
 
+@st.fragment
 def comparison_distributions_tab():
     """Вкладка сравнения распределений"""
-    if "visited_tabs" not in st.session_state:
-        st.session_state.visited_tabs = set()
-    st.session_state.visited_tabs.add("Сравнение распределений")
+    mark_tab_visited("Сравнение распределений")
 
     st.header("Сравнение распределений")
     st.markdown("Интерактивное сравнение различных вероятностных распределений и их характеристик.")
@@ -48,12 +68,14 @@ def comparison_distributions_tab():
 
     sample_size = st.slider("Размер выборки", 1000, 10000, 5000)
 
-    data1 = generate_distribution_data(dist1, sample_size, **params1)
-    data2 = generate_distribution_data(dist2, sample_size, **params2)
+    # Своё зерно для каждой стороны: данные определяются параметрами (как и ключ PNG в кэше),
+    # а одинаковые настройки слева и справа не дают одну и ту же выборку
+    data1 = generate_distribution_data(dist1, sample_size, seed=RNG_SEED, **params1)
+    data2 = generate_distribution_data(dist2, sample_size, seed=RNG_SEED + 1, **params2)
 
-    fig, ax = plt.subplots(figsize=(12, 6))
-    sns.histplot(data1, bins=30, alpha=0.6, label=f"{dist1}", color="blue", kde=True, ax=ax)
-    sns.histplot(data2, bins=30, alpha=0.6, label=f"{dist2}", color="red", kde=True, ax=ax)
+    fig, ax = new_figure((12, 6))
+    hist_with_kde(ax, data1, bins=30, alpha=0.6, label=f"{dist1}", color="blue")
+    hist_with_kde(ax, data2, bins=30, alpha=0.6, label=f"{dist2}", color="red")
 
     ax.set_title(f"Сравнение распределений: {dist1} vs {dist2}", fontsize=14)
     ax.set_xlabel("Значение")
@@ -61,10 +83,10 @@ def comparison_distributions_tab():
     ax.legend()
     ax.grid(True, alpha=0.3)
 
-    fig.tight_layout()
     st.pyplot(fig, use_container_width=True)
 
-    create_download_button(fig, "comparison.png")
+    create_download_button(fig, "comparison.png",
+                           cache_key=(dist1, tuple(params1.items()), dist2, tuple(params2.items()), sample_size))
 
     col1, col2 = st.columns(2)
     with col1:
@@ -1,17 +1,53 @@
 import streamlit as st
 import numpy as np
-import matplotlib.pyplot as plt
-from scipy import stats
-from .utils import create_download_button
+from functools import lru_cache
+from .utils import create_download_button, new_figure, mark_tab_visited
 
 
+@lru_cache(maxsize=None)
+def _pdf_curves() -> dict:
+    """Кривые плотности/вероятности для фиксированных параметров демонстрации (считаются один раз)"""
+    from scipy import stats
+    x_norm = np.linspace(-4, 4, 1000)
+    x_unif = np.linspace(-0.5, 2.5, 1000)
+    x_binom = np.arange(0, 21)
+    x_pois = np.arange(0, 15)
+    x_exp = np.linspace(0, 5, 1000)
+    x_lognorm = np.linspace(0.01, 5, 1000)
+    x_chi2 = np.linspace(0.01, 15, 1000)
+    return {
+        "Нормальное (Гауссово)": (x_norm, stats.norm.pdf(x_norm, 0, 1)),
+        "Равномерное": (x_unif, np.where((x_unif >= 0) & (x_unif <= 2), 1/2, 0)),
+        "Биномиальное": (x_binom, stats.binom.pmf(x_binom, 20, 0.3)),
+        "Пуассона": (x_pois, stats.poisson.pmf(x_pois, 5)),
+        "Экспоненциальное": (x_exp, stats.expon.pdf(x_exp, scale=1)),
+        "Логнормальное": (x_lognorm, stats.lognorm.pdf(x_lognorm, s=0.5, scale=np.exp(0))),
+        "Хи-квадрат": (x_chi2, stats.chi2.pdf(x_chi2, 5)),
+        "Стьюдента (t)": (x_norm, stats.t.pdf(x_norm, 5), stats.norm.pdf(x_norm)),
+    }
+
+
+@lru_cache(maxsize=None)
+def _comparison_curves() -> dict:
+    """Кривые для визуального сравнения групп распределений (считаются один раз)"""
+    from scipy import stats
+    x_cont = np.linspace(-4, 8, 1000)
+    x_pos = x_cont[x_cont >= 0]
+    x_disc = np.arange(0, 21)
+    return {
+        "Непрерывные распределения": (x_cont, stats.norm.pdf(x_cont), stats.uniform.pdf(x_cont, 0, 2),
+                                      x_pos, stats.expon.pdf(x_pos)),
+        "Дискретные распределения": (x_disc, stats.binom.pmf(x_disc, 20, 0.25), stats.poisson.pmf(x_disc, 5)),
+    }
+
+
+@st.cache_data(show_spinner=False)
 def create_distribution_plot(dist_name: str):
     """Создание графика выбранного распределения"""
-    fig, ax = plt.subplots(figsize=(10, 6))
+    fig, ax = new_figure((10, 6))
     if dist_name == "Нормальное (Гауссово)":
         mu, sigma = 0, 1
-        x = np.linspace(-4, 4, 1000)
-        y = stats.norm.pdf(x, mu, sigma)
+        x, y = _pdf_curves()[dist_name]
         ax.plot(x, y, linewidth=3, color='blue')
         ax.fill_between(x, y, alpha=0.3)
         ax.axvline(mu, color='red', linestyle='--', linewidth=2, label=f'μ = {mu}')
@@ -20,38 +56,33 @@ def create_distribution_plot(dist_name: str):
         ax.set_title("Нормальное распределение N(0,1)", fontsize=14)
     elif dist_name == "Равномерное":
         a, b = 0, 2
-        x = np.linspace(-0.5, 2.5, 1000)
-        y = np.where((x >= a) & (x <= b), 1/(b-a), 0)
+        x, y = _pdf_curves()[dist_name]
         ax.plot(x, y, linewidth=3, color='green')
         ax.fill_between(x, y, alpha=0.3)
         ax.axvline((a+b)/2, color='red', linestyle='--', linewidth=2, label=f'μ = {(a+b)/2}')
         ax.set_title(f"Равномерное распределение U({a},{b})", fontsize=14)
     elif dist_name == "Биномиальное":
         n, p = 20, 0.3
-        x = np.arange(0, n+1)
-        y = stats.binom.pmf(x, n, p)
+        x, y = _pdf_curves()[dist_name]
         ax.bar(x, y, alpha=0.7, color='orange', edgecolor='black')
         ax.axvline(n*p, color='red', linestyle='--', linewidth=2, label=f'μ = {n*p:.1f}')
         ax.set_title(f"Биномиальное распределение B({n},{p})", fontsize=14)
     elif dist_name == "Пуассона":
         lam = 5
-        x = np.arange(0, 15)
-        y = stats.poisson.pmf(x, lam)
+        x, y = _pdf_curves()[dist_name]
         ax.bar(x, y, alpha=0.7, color='purple', edgecolor='black')
         ax.axvline(lam, color='red', linestyle='--', linewidth=2, label=f'μ = {lam}')
         ax.set_title(f"Распределение Пуассона (λ = {lam})", fontsize=14)
     elif dist_name == "Экспоненциальное":
         lam = 1
-        x = np.linspace(0, 5, 1000)
-        y = stats.expon.pdf(x, scale=1/lam)
+        x, y = _pdf_curves()[dist_name]
         ax.plot(x, y, linewidth=3, color='red')
         ax.fill_between(x, y, alpha=0.3)
         ax.axvline(1/lam, color='blue', linestyle='--', linewidth=2, label=f'μ = {1/lam}')
         ax.set_title(f"Экспоненциальное распределение (λ = {lam})", fontsize=14)
     elif dist_name == "Логнормальное":
         mu, sigma = 0, 0.5
-        x = np.linspace(0.01, 5, 1000)
-        y = stats.lognorm.pdf(x, s=sigma, scale=np.exp(mu))
+        x, y = _pdf_curves()[dist_name]
         ax.plot(x, y, linewidth=3, color='brown')
         ax.fill_between(x, y, alpha=0.3)
         mean_ln = np.exp(mu + sigma**2/2)
@@ -59,17 +90,14 @@ def create_distribution_plot(dist_name: str):
         ax.set_title("Логнормальное распределение", fontsize=14)
     elif dist_name == "Хи-квадрат":
         df = 5
-        x = np.linspace(0.01, 15, 1000)
-        y = stats.chi2.pdf(x, df)
+        x, y = _pdf_curves()[dist_name]
         ax.plot(x, y, linewidth=3, color='darkgreen')
         ax.fill_between(x, y, alpha=0.3)
         ax.axvline(df, color='red', linestyle='--', linewidth=2, label=f'μ = {df}')
         ax.set_title(f"Распределение χ² (df = {df})", fontsize=14)
     elif dist_name == "Стьюдента (t)":
         df = 5
-        x = np.linspace(-4, 4, 1000)
-        y_t = stats.t.pdf(x, df)
-        y_norm = stats.norm.pdf(x)
+        x, y_t, y_norm = _pdf_curves()[dist_name]
         ax.plot(x, y_t, linewidth=3, label=f"t-распределение (df={df})", color='darkblue')
         ax.plot(x, y_norm, linestyle='--', linewidth=2, label="N(0,1)", color='gray')
         ax.fill_between(x, y_t, alpha=0.3)
@@ -78,7 +106,6 @@ def create_distribution_plot(dist_name: str):
     ax.set_ylabel("f(x) или P(X=x)", fontsize=12)
     ax.legend(fontsize=10)
     ax.grid(True, alpha=0.3)
-    fig.tight_layout()
     return fig
 
 
@@ -197,11 +224,10 @@ def display_distribution_info(dist_name: str):
             st.markdown("""**🔑 Ключевые свойства:**\n• Отсутствие памяти (memoryless property)\n• Тяжелый правый хвост\n• Связано с распределением Пуассона""")
 
 
+@st.fragment
 def distribution_types_tab():
     """Вкладка типов распределений"""
-    if "visited_tabs" not in st.session_state:
-        st.session_state.visited_tabs = set()
-    st.session_state.visited_tabs.add("Типы распределений")
+    mark_tab_visited("Типы распределений")
 
     st.header("Типы вероятностных распределений")
     st.markdown("Интерактивное изучение основных вероятностных распределений, их свойств и применений.")
@@ -218,7 +244,7 @@ def distribution_types_tab():
     with col1:
         fig = create_distribution_plot(chosen_dist)
         st.pyplot(fig, use_container_width=True)
-        create_download_button(fig, f"{chosen_dist.lower().replace(' ', '_')}.png")
+        create_download_button(fig, f"{chosen_dist.lower().replace(' ', '_')}.png", cache_key=(chosen_dist,))
     with col2:
         display_distribution_info(chosen_dist)
 
@@ -236,26 +262,26 @@ def distribution_types_tab():
         st.table(comparison_data)
     else:
         comparison_mode = st.selectbox("Выберите группу для сравнения:", ["Непрерывные распределения", "Дискретные распределения"])
-        fig, ax = plt.subplots(figsize=(12, 6))
+        fig, ax = new_figure((12, 6))
         if comparison_mode == "Непрерывные распределения":
-            x = np.linspace(-4, 8, 1000)
-            ax.plot(x, stats.norm.pdf(x), label="Нормальное N(0,1)", linewidth=2)
-            ax.plot(x, stats.uniform.pdf(x, 0, 2), label="Равномерное U(0,2)", linewidth=2)
-            ax.plot(x[x>=0], stats.expon.pdf(x[x>=0]), label="Экспоненциальное λ=1", linewidth=2)
+            x, y_norm, y_unif, x_pos, y_exp = _comparison_curves()[comparison_mode]
+            ax.plot(x, y_norm, label="Нормальное N(0,1)", linewidth=2)
+            ax.plot(x, y_unif, label="Равномерное U(0,2)", linewidth=2)
+            ax.plot(x_pos, y_exp, label="Экспоненциальное λ=1", linewidth=2)
             ax.set_title("Сравнение непрерывных распределений")
             ax.set_xlim(-1, 6)
         else:
-            x = np.arange(0, 21)
-            ax.bar(x-0.2, stats.binom.pmf(x, 20, 0.25), width=0.4, alpha=0.7, label="Биномиальное B(20,0.25)")
-            ax.bar(x+0.2, stats.poisson.pmf(x, 5), width=0.4, alpha=0.7, label="Пуассона λ=5")
+            x, y_binom, y_pois = _comparison_curves()[comparison_mode]
+            ax.bar(x-0.2, y_binom, width=0.4, alpha=0.7, label="Биномиальное B(20,0.25)")
+            ax.bar(x+0.2, y_pois, width=0.4, alpha=0.7, label="Пуассона λ=5")
             ax.set_title("Сравнение дискретных распределений")
         ax.legend()
         ax.grid(True, alpha=0.3)
         ax.set_xlabel("x")
         ax.set_ylabel("f(x) или P(X=x)")
-        fig.tight_layout()
         st.pyplot(fig, use_container_width=True)
-        create_download_button(fig, f"comparison_{comparison_mode.lower().replace(' ', '_')}.png")
+        create_download_button(fig, f"comparison_{comparison_mode.lower().replace(' ', '_')}.png",
+                               cache_key=(comparison_mode,))
 
     st.markdown("---")
     st.subheader("🎯 Как выбрать подходящее распределение?")
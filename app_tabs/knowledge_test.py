@@ -1,12 +1,94 @@
 import streamlit as st
-import time
+from .utils import mark_tab_visited
 
 
+# (вопрос, варианты ответа, индекс правильного варианта, пояснение)
+_QUESTIONS = (
+    (
+        "Согласно закону трёх сигм, какой процент значений попадает в диапазон ±2σ?",
+        ("68%", "95%", "99.7%", "50%"),
+        1,
+        "Согласно закону трёх сигм, 95% значений попадают в диапазон ±2σ от среднего."
+    ),
+    (
+        "Что утверждает Центральная предельная теорема?",
+        (
+            "Все распределения являются нормальными",
+            "Среднее большой выборки равно среднему популяции",
+            "Распределение выборочных средних приближается к нормальному",
+            "Дисперсия уменьшается с увеличением выборки",
+        ),
+        2,
+        "ЦПТ утверждает, что распределение выборочных средних приближается к нормальному при увеличении размера выборки."
+    ),
+    (
+        "Что такое регрессия к среднему?",
+        (
+            "Математический метод анализа",
+            "Тенденция экстремальных значений быть ближе к среднему при повторном измерении",
+            "Способ вычисления среднего значения",
+            "Тип статистического распределения",
+        ),
+        1,
+        "Регрессия к среднему — феномен, при котором экстремальные значения при повторном измерении стремятся ближе к среднему популяции."
+    ),
+    (
+        "Закон больших чисел утверждает, что:",
+        (
+            "Большие числа всегда точнее малых",
+            "При увеличении размера выборки среднее стремится к истинному среднему популяции",
+            "Вероятность всегда равна 0.5",
+            "Большие выборки всегда нормально распределены",
+        ),
+        1,
+        "ЗБЧ показывает, что с увеличением размера выборки выборочное среднее сходится к истинному среднему популяции."
+    ),
+    (
+        "Какая основная проблема с малыми выборками?",
+        (
+            "Они всегда дают неправильные результаты",
+            "Они имеют высокую вариабельность и ненадежные оценки",
+            "Они не могут быть использованы в статистике",
+            "Они всегда имеют нормальное распределение",
+        ),
+        1,
+        "Малые выборки характеризуются высокой вариабельностью оценок, что делает выводы менее надежными."
+    ),
+)
+
+
+def _submit_answer():
+    """Проверка ответа и переход к следующему вопросу (выполняется до перезапуска скрипта)"""
+    idx = st.session_state.current_question
+    answer_idx = st.session_state[f"q_{idx}"]
+    if answer_idx is None:
+        st.session_state.answer_missing = True
+        return
+    _, _, correct_idx, explanation = _QUESTIONS[idx]
+    is_correct = answer_idx == correct_idx
+    if is_correct:
+        st.session_state.test_score += 1
+    st.session_state.last_feedback = (is_correct, explanation)
+    st.session_state.current_question += 1
+    if st.session_state.current_question >= len(_QUESTIONS):
+        st.session_state.test_completed = True
+
+
+def _show_last_feedback():
+    """Отображение результата предыдущего ответа"""
+    feedback = st.session_state.get("last_feedback")
+    if feedback:
+        is_correct, explanation = feedback
+        if is_correct:
+            st.success("✅ Правильно! " + explanation)
+        else:
+            st.error("❌ Неправильно. " + explanation)
+
+
+@st.fragment
 def knowledge_test_tab():
     """Вкладка проверки знаний"""
-    if "visited_tabs" not in st.session_state:
-        st.session_state.visited_tabs = set()
-    st.session_state.visited_tabs.add("Проверь свои знания")
+    mark_tab_visited("Проверь свои знания")
 
     st.header("Проверь свои знания")
     st.markdown("Интерактивный тест для закрепления изученного материала.")
@@ -15,83 +97,25 @@ def knowledge_test_tab():
         st.session_state.test_score = 0
         st.session_state.test_completed = False
         st.session_state.current_question = 0
-
-    questions = [
-        {
-            "question": "Согласно закону трёх сигм, какой процент значений попадает в диапазон ±2σ?",
-            "options": ["68%", "95%", "99.7%", "50%"],
-            "correct": 1,
-            "explanation": "Согласно закону трёх сигм, 95% значений попадают в диапазон ±2σ от среднего."
-        },
-        {
-            "question": "Что утверждает Центральная предельная теорема?",
-            "options": [
-                "Все распределения являются нормальными",
-                "Среднее большой выборки равно среднему популяции",
-                "Распределение выборочных средних приближается к нормальному",
-                "Дисперсия уменьшается с увеличением выборки"
-            ],
-            "correct": 2,
-            "explanation": "ЦПТ утверждает, что распределение выборочных средних приближается к нормальному при увеличении размера выборки."
-        },
-        {
-            "question": "Что такое регрессия к среднему?",
-            "options": [
-                "Математический метод анализа",
-                "Тенденция экстремальных значений быть ближе к среднему при повторном измерении",
-                "Способ вычисления среднего значения",
-                "Тип статистического распределения"
-            ],
-            "correct": 1,
-            "explanation": "Регрессия к среднему — феномен, при котором экстремальные значения при повторном измерении стремятся ближе к среднему популяции."
-        },
-        {
-            "question": "Закон больших чисел утверждает, что:",
-            "options": [
-                "Большие числа всегда точнее малых",
-                "При увеличении размера выборки среднее стремится к истинному среднему популяции",
-                "Вероятность всегда равна 0.5",
-                "Большие выборки всегда нормально распределены"
-            ],
-            "correct": 1,
-            "explanation": "ЗБЧ показывает, что с увеличением размера выборки выборочное среднее сходится к истинному среднему популяции."
-        },
-        {
-            "question": "Какая основная проблема с малыми выборками?",
-            "options": [
-                "Они всегда дают неправильные результаты",
-                "Они имеют высокую вариабельность и ненадежные оценки",
-                "Они не могут быть использованы в статистике",
-                "Они всегда имеют нормальное распределение"
-            ],
-            "correct": 1,
-            "explanation": "Малые выборки характеризуются высокой вариабельностью оценок, что делает выводы менее надежными."
-        }
-    ]
+        st.session_state.last_feedback = None
 
     if not st.session_state.test_completed:
-        current_q = questions[st.session_state.current_question]
-        st.subheader(f"Вопрос {st.session_state.current_question + 1} из {len(questions)}")
-        st.write(current_q["question"])
-        answer = st.radio("Выберите ответ:", current_q["options"], key=f"q_{st.session_state.current_question}")
-        if st.button("Ответить"):
-            selected_idx = current_q["options"].index(answer)
-            if selected_idx == current_q["correct"]:
-                st.success("✅ Правильно! " + current_q["explanation"])
-                st.session_state.test_score += 1
-            else:
-                st.error("❌ Неправильно. " + current_q["explanation"])
-            st.session_state.current_question += 1
-            if st.session_state.current_question >= len(questions):
-                st.session_state.test_completed = True
-                st.rerun()
-            else:
-                time.sleep(2)
-                st.rerun()
+        _show_last_feedback()
+        if st.session_state.pop("answer_missing", False):
+            st.warning("Выберите вариант ответа.")
+        question, options, _, _ = _QUESTIONS[st.session_state.current_question]
+        with st.form("knowledge_test_form"):
+            st.subheader(f"Вопрос {st.session_state.current_question + 1} из {len(_QUESTIONS)}")
+            st.write(question)
+            # Радиокнопка возвращает индекс варианта, поэтому поиск ответа по строке не нужен
+            st.radio("Выберите ответ:", range(len(options)), format_func=options.__getitem__,
+                     index=None, key=f"q_{st.session_state.current_question}")
+            st.form_submit_button("Ответить", on_click=_submit_answer)
     else:
-        score_pct = (st.session_state.test_score / len(questions)) * 100
+        _show_last_feedback()
+        score_pct = (st.session_state.test_score / len(_QUESTIONS)) * 100
         st.subheader("🎯 Результаты теста")
-        st.write(f"Ваш результат: **{st.session_state.test_score} из {len(questions)}** ({score_pct:.0f}%)")
+        st.write(f"Ваш результат: **{st.session_state.test_score} из {len(_QUESTIONS)}** ({score_pct:.0f}%)")
         st.progress(score_pct / 100)
         if score_pct >= 80:
             st.success("🏆 Отлично! Вы хорошо усвоили материал!")
@@ -105,7 +129,8 @@ def knowledge_test_tab():
                 st.session_state.test_score = 0
                 st.session_state.test_completed = False
                 st.session_state.current_question = 0
-                st.rerun()
+                st.session_state.last_feedback = None
+                st.rerun(scope="fragment")
         with col2:
             if st.button("📖 Вернуться к изучению"):
                 st.info("Используйте вкладки выше для повторения материала!")
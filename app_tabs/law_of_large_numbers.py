@@ -1,7 +1,9 @@
 import streamlit as st
 import numpy as np
-import matplotlib.pyplot as plt
-from .utils import generate_distribution_data, create_download_button
+from functools import partial
+from typing import Tuple
+from .utils import (generate_distribution_data, create_download_button, running_mean, session_figure,
+                    mark_tab_visited, RNG_SEED)
 
 
 def theoretical_mean(dist_type: str) -> float:
@@ -14,11 +16,32 @@ def theoretical_mean(dist_type: str) -> float:
     return means.get(dist_type, 0.0)
 
 
+@st.cache_data(max_entries=64, show_spinner=False)
+def lln_curve(dist_type: str, trials: int, seed: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Накопленное среднее, прореженное до ~1000 точек: считается один раз на набор параметров"""
+    cumulative = running_mean(generate_distribution_data(dist_type, trials, seed=seed))
+    # Логарифмическая сетка: плотно в начале, где среднее сильно колеблется, и редко на плато
+    idx = np.unique(np.geomspace(1, trials, 1024).astype(np.int64)) - 1
+    return idx + 1, cumulative[idx]
+
+
+def plot_lln_curve(ax, xs: np.ndarray, cumulative: np.ndarray, expected: float):
+    """Накопленное среднее и линия теоретического среднего"""
+    ax.plot(xs, cumulative, label="Накопленное среднее", linewidth=2)
+    ax.axhline(expected, color='r', linestyle='--', linewidth=2,
+              label=f"Теоретическое среднее ({expected:.3f})")
+
+    ax.set_title("Закон больших чисел", fontsize=14)
+    ax.set_xlabel("Количество испытаний")
+    ax.set_ylabel("Среднее значение")
+    ax.legend()
+    ax.grid(True, alpha=0.3)
+
+
+@st.fragment
 def law_of_large_numbers_tab():
     """Вкладка закона больших чисел"""
-    if "visited_tabs" not in st.session_state:
-        st.session_state.visited_tabs = set()
-    st.session_state.visited_tabs.add("ЗБЧ")
+    mark_tab_visited("ЗБЧ")
 
     st.header("Закон больших чисел")
 
@@ -29,25 +52,16 @@ def law_of_large_numbers_tab():
     with col2:
         trials = st.slider("Количество испытаний", 100, 20000, 10000, step=100)
 
-    data_lln = generate_distribution_data(dist_type_lln, trials)
-    cumulative = np.cumsum(data_lln) / np.arange(1, trials + 1)
+    xs, cumulative = lln_curve(dist_type_lln, trials, RNG_SEED)
     expected = theoretical_mean(dist_type_lln)
 
-    fig, ax = plt.subplots(figsize=(12, 6))
-    ax.plot(cumulative, label="Накопленное среднее", linewidth=2)
-    ax.axhline(expected, color='r', linestyle='--', linewidth=2,
-              label=f"Теоретическое среднее ({expected:.3f})")
-
-    ax.set_title("Закон больших чисел", fontsize=14)
-    ax.set_xlabel("Количество испытаний")
-    ax.set_ylabel("Среднее значение")
-    ax.legend()
-    ax.grid(True, alpha=0.3)
+    fig, ax = session_figure("lln", (12, 6))
+    draw = partial(plot_lln_curve, xs=xs, cumulative=cumulative, expected=expected)
+    draw(ax)
 
-    fig.tight_layout()
     st.pyplot(fig, use_container_width=True)
 
-    create_download_button(fig, "lln.png")
+    create_download_button(fig, "lln.png", cache_key=(dist_type_lln, trials), draw=draw)
 
     st.markdown(
         f"""
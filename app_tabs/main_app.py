@@ -1,6 +1,7 @@
 import streamlit as st
-import seaborn as sns
-import matplotlib.pyplot as plt
+import matplotlib
+matplotlib.use("Agg")  # серверная растеризация без GUI-бэкенда
+from cycler import cycler
 
 from .three_sigma import three_sigma_law_tab
 from .central_limit import central_limit_theorem_tab
@@ -10,9 +11,68 @@ from .comparison import comparison_distributions_tab
 from .regression import regression_to_mean_tab
 from .knowledge_test import knowledge_test_tab
 from .distribution_types import distribution_types_tab
-from .utils import generate_distribution_data, safe_statistics, create_download_button, format_stat_display
+from .utils import (generate_distribution_data, safe_statistics, create_download_button, format_stat_display,
+                    visited_tabs_count)
 
-sns.set_theme(style="whitegrid")
+# Тема seaborn "whitegrid" (контекст notebook, палитра deep) в виде rcParams: без импорта seaborn
+_THEME_RC = {
+    'axes.axisbelow': True,
+    'axes.edgecolor': '.8',
+    'axes.grid': True,
+    'axes.labelcolor': '.15',
+    'axes.labelsize': 12,
+    'axes.linewidth': 1.25,
+    'axes.prop_cycle': cycler('color', ['#4c72b0', '#dd8452', '#55a868', '#c44e52', '#8172b3',
+                                        '#937860', '#da8bc3', '#8c8c8c', '#ccb974', '#64b5cd']),
+    'axes.titlesize': 12,
+    'font.sans-serif': ['Arial', 'DejaVu Sans', 'Liberation Sans', 'Bitstream Vera Sans', 'sans-serif'],
+    'font.size': 12,
+    'grid.color': '.8',
+    'grid.linewidth': 1,
+    'legend.fontsize': 11,
+    'legend.title_fontsize': 12,
+    'lines.solid_capstyle': 'round',
+    'patch.edgecolor': 'w',
+    'patch.force_edgecolor': True,
+    'text.color': '.15',
+    'xtick.bottom': False,
+    'xtick.color': '.15',
+    'xtick.labelsize': 11,
+    'xtick.major.size': 6,
+    'xtick.major.width': 1.25,
+    'xtick.minor.size': 4,
+    'xtick.minor.width': 1,
+    'ytick.color': '.15',
+    'ytick.labelsize': 11,
+    'ytick.left': False,
+    'ytick.major.size': 6,
+    'ytick.major.width': 1.25,
+    'ytick.minor.size': 4,
+    'ytick.minor.width': 1,
+    'path.simplify': True,
+    'agg.path.chunksize': 10000,
+}
+matplotlib.rcParams.update(_THEME_RC)
+
+
+_REFERENCES = {
+    "Закон трёх сигм": "https://en.wikipedia.org/wiki/68–95–99.7_rule",
+    "Центральная предельная теорема": "https://ru.wikipedia.org/wiki/Центральная_предельная_теорема",
+    "Закон больших чисел": "https://ru.wikipedia.org/wiki/Закон_больших_чисел",
+    "Закон малых чисел": "https://ru.wikipedia.org/wiki/Закон_малых_чисел_(психология)",
+    "Регрессия к среднему": "https://ru.wikipedia.org/wiki/Регрессия_к_среднему"
+}
+_DESCRIPTIONS = {
+    "Закон трёх сигм": "68-95-99.7% правило для нормального распределения",
+    "Центральная предельная теорема": "При больших n распределение средних стремится к нормальному (среднее μ, σ/√n)",
+    "Закон больших чисел": "Среднее сходится к математическому ожиданию при n→∞",
+    "Закон малых чисел": "Ошибки при обобщении малых выборок",
+    "Регрессия к среднему": "Ошибки из-за экстремальных выбросов"
+}
+# Справка собирается один раз при импорте и выводится одним st.markdown
+_SIDEBAR_MD = "\n\n".join(
+    f"**{name}**\n{_DESCRIPTIONS[name]}\n[Статья на Wikipedia]({url})" for name, url in _REFERENCES.items()
+)
 
 
 def main():
@@ -45,22 +105,7 @@ def main():
 def setup_sidebar():
     with st.sidebar:
         st.header("📖 Справка и формулы")
-        references = {
-            "Закон трёх сигм": "https://en.wikipedia.org/wiki/68–95–99.7_rule",
-            "Центральная предельная теорема": "https://ru.wikipedia.org/wiki/Центральная_предельная_теорема",
-            "Закон больших чисел": "https://ru.wikipedia.org/wiki/Закон_больших_чисел",
-            "Закон малых чисел": "https://ru.wikipedia.org/wiki/Закон_малых_чисел_(психология)",
-            "Регрессия к среднему": "https://ru.wikipedia.org/wiki/Регрессия_к_среднему"
-        }
-        descriptions = {
-            "Закон трёх сигм": "68-95-99.7% правило для нормального распределения",
-            "Центральная предельная теорема": "При больших n распределение средних стремится к нормальному (среднее μ, σ/√n)",
-            "Закон больших чисел": "Среднее сходится к математическому ожиданию при n→∞",
-            "Закон малых чисел": "Ошибки при обобщении малых выборок",
-            "Регрессия к среднему": "Ошибки из-за экстремальных выбросов"
-        }
-        for name, url in references.items():
-            st.markdown(f"**{name}**\n{descriptions[name]}\n[Статья на Wikipedia]({url})", unsafe_allow_html=True)
+        st.markdown(_SIDEBAR_MD, unsafe_allow_html=True)
         st.markdown("### 🔰 Для начинающих")
         if st.checkbox("Включить справочный режим"):
             st.info(
@@ -87,10 +132,6 @@ def setup_sidebar():
 
 
 def setup_footer():
-    try:
-        plt.close('all')
-    except Exception as e:
-        st.error(f"Ошибка при обработке графиков: {str(e)}")
     if "page_views" not in st.session_state:
         st.session_state.page_views = 0
     st.session_state.page_views += 1
@@ -119,10 +160,7 @@ def setup_footer():
     with col3:
         st.markdown("### 📊 Статистика использования")
         st.metric("Просмотров сессии", st.session_state.page_views)
-        if "visited_tabs" not in st.session_state:
-            st.session_state.visited_tabs = set()
-        visited_count = len(st.session_state.visited_tabs)
-        total_tabs = 8
+        visited_count, total_tabs = visited_tabs_count()
         progress = visited_count / total_tabs
         st.metric("Изучено разделов", f"{visited_count}/{total_tabs}")
         st.progress(progress)
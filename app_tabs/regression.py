@@ -1,28 +1,31 @@
 import streamlit as st
 import numpy as np
-import matplotlib.pyplot as plt
+from functools import partial
 from typing import Optional, Tuple
-from .utils import create_download_button
+from .utils import create_download_button, session_figure, make_rng, mark_tab_visited, RNG_SEED
 
+_MAX_SCATTER_POINTS = 200
 
-@st.cache_data
+
+@st.cache_data(max_entries=64, show_spinner=False)
 def generate_regression_data(mu_reg: int, sigma_reg: int, n_subjects: int,
                            threshold_percentile: int) -> Optional[Tuple]:
     """Генерация данных для демонстрации регрессии к среднему"""
     try:
-        true_abilities = np.random.normal(mu_reg, sigma_reg/2, n_subjects)
-        test1_scores = true_abilities + np.random.normal(0, sigma_reg/2, n_subjects)
-        test2_scores = true_abilities + np.random.normal(0, sigma_reg/2, n_subjects)
-        threshold = np.percentile(test1_scores, threshold_percentile)
-        best_subjects_mask = test1_scores >= threshold
-        if np.sum(best_subjects_mask) == 0:
-            return None
-        best_subjects_test1 = test1_scores[best_subjects_mask]
-        best_subjects_test2 = test2_scores[best_subjects_mask]
-        all_mean_test1 = np.mean(test1_scores)
-        all_mean_test2 = np.mean(test2_scores)
-        best_mean_test1 = np.mean(best_subjects_test1)
-        best_mean_test2 = np.mean(best_subjects_test2)
+        # Одна матрица (3, n): истинные способности и шум двух тестов
+        z = make_rng(RNG_SEED).standard_normal((3, n_subjects)) * (sigma_reg / 2)
+        true_abilities = z[0] + mu_reg
+        test1_scores = true_abilities + z[1]
+        test2_scores = true_abilities + z[2]
+        # Верхние k по первому тесту за O(n) без сортировки и булевой маски
+        k = max(1, int(round(n_subjects * (100 - threshold_percentile) / 100)))
+        top_idx = np.argpartition(test1_scores, -k)[-k:]
+        best_subjects_test1 = test1_scores[top_idx]
+        best_subjects_test2 = test2_scores[top_idx]
+        all_mean_test1 = test1_scores.mean()
+        all_mean_test2 = test2_scores.mean()
+        best_mean_test1 = best_subjects_test1.sum() / k
+        best_mean_test2 = best_subjects_test2.sum() / k
         return (
             test1_scores, test2_scores, best_subjects_test1, best_subjects_test2,
             all_mean_test1, all_mean_test2, best_mean_test1, best_mean_test2
@@ -32,11 +35,37 @@ def generate_regression_data(mu_reg: int, sigma_reg: int, n_subjects: int,
         return None
 
 
+def plot_regression(ax, regression_data: Tuple, shown, threshold_percentile: int):
+    """Диаграмма рассеяния двух тестов со средними всех и лучших субъектов"""
+    (
+        test1_scores, test2_scores, best_subjects_test1, best_subjects_test2,
+        all_mean_test1, all_mean_test2, best_mean_test1, best_mean_test2
+    ) = regression_data
+    ax.scatter(test1_scores[shown], test2_scores[shown], alpha=0.4, label="Все субъекты", color="gray", s=20)
+    ax.scatter(best_subjects_test1, best_subjects_test2, alpha=0.7,
+               label=f"Лучшие субъекты (> {threshold_percentile}%)", color="red", s=30)
+    min_val = min(np.min(test1_scores), np.min(test2_scores))
+    max_val = max(np.max(test1_scores), np.max(test2_scores))
+    ax.plot([min_val, max_val], [min_val, max_val], 'k--', alpha=0.5, label="Линия y=x", linewidth=2)
+    ax.axvline(all_mean_test1, color='blue', linestyle=':', alpha=0.7,
+              label=f"Среднее Тест 1 (все): {all_mean_test1:.1f}")
+    ax.axhline(all_mean_test2, color='green', linestyle=':', alpha=0.7,
+              label=f"Среднее Тест 2 (все): {all_mean_test2:.1f}")
+    ax.axvline(best_mean_test1, color='red', linestyle='--', alpha=0.7,
+              label=f"Среднее Тест 1 (лучшие): {best_mean_test1:.1f}")
+    ax.axhline(best_mean_test2, color='orange', linestyle='--', alpha=0.7,
+              label=f"Среднее Тест 2 (лучшие): {best_mean_test2:.1f}")
+    ax.set_title("Регрессия к среднему", fontsize=14)
+    ax.set_xlabel("Результаты первого теста")
+    ax.set_ylabel("Результаты второго теста")
+    ax.grid(True, alpha=0.3)
+    ax.legend(loc='upper left', bbox_to_anchor=(1, 1))
+
+
+@st.fragment
 def regression_to_mean_tab():
     """Вкладка регрессии к среднему"""
-    if "visited_tabs" not in st.session_state:
-        st.session_state.visited_tabs = set()
-    st.session_state.visited_tabs.add("Регрессия к среднему")
+    mark_tab_visited("Регрессия к среднему")
 
     st.header("Регрессия к среднему")
     st.markdown(
@@ -51,6 +80,7 @@ def regression_to_mean_tab():
     with col2:
         n_subjects = st.slider("Количество субъектов", 20, 500, 100)
         threshold_percentile = st.slider("Порог отбора (процентиль)", 70, 95, 80)
+    fast_render = st.checkbox("Быстрая отрисовка (не более 200 точек на графике)", value=True)
 
     regression_data = generate_regression_data(mu_reg, sigma_reg, n_subjects, threshold_percentile)
     if regression_data:
@@ -59,30 +89,19 @@ def regression_to_mean_tab():
             all_mean_test1, all_mean_test2, best_mean_test1, best_mean_test2
         ) = regression_data
 
-        fig, ax = plt.subplots(figsize=(12, 8))
-        ax.scatter(test1_scores, test2_scores, alpha=0.4, label="Все субъекты", color="gray", s=20)
-        ax.scatter(best_subjects_test1, best_subjects_test2, alpha=0.7,
-                   label=f"Лучшие субъекты (> {threshold_percentile}%)", color="red", s=30)
-        min_val = min(np.min(test1_scores), np.min(test2_scores))
-        max_val = max(np.max(test1_scores), np.max(test2_scores))
-        ax.plot([min_val, max_val], [min_val, max_val], 'k--', alpha=0.5, label="Линия y=x", linewidth=2)
-        ax.axvline(all_mean_test1, color='blue', linestyle=':', alpha=0.7,
-                  label=f"Среднее Тест 1 (все): {all_mean_test1:.1f}")
-        ax.axhline(all_mean_test2, color='green', linestyle=':', alpha=0.7,
-                  label=f"Среднее Тест 2 (все): {all_mean_test2:.1f}")
-        ax.axvline(best_mean_test1, color='red', linestyle='--', alpha=0.7,
-                  label=f"Среднее Тест 1 (лучшие): {best_mean_test1:.1f}")
-        ax.axhline(best_mean_test2, color='orange', linestyle='--', alpha=0.7,
-                  label=f"Среднее Тест 2 (лучшие): {best_mean_test2:.1f}")
-        ax.set_title("Регрессия к среднему", fontsize=14)
-        ax.set_xlabel("Результаты первого теста")
-        ax.set_ylabel("Результаты второго теста")
-        ax.grid(True, alpha=0.3)
-        ax.legend(loc='upper left', bbox_to_anchor=(1, 1))
-
-        fig.tight_layout()
+        fig, ax = session_figure("regression", (12, 8), right=0.7)
+        # Прореживается только отображение серых точек: статистики считаются по всем субъектам
+        shown = slice(None)
+        if fast_render and n_subjects > _MAX_SCATTER_POINTS:
+            shown = make_rng(RNG_SEED).choice(n_subjects, _MAX_SCATTER_POINTS, replace=False)
+        draw = partial(plot_regression, regression_data=regression_data, shown=shown,
+                       threshold_percentile=threshold_percentile)
+        draw(ax)
+
         st.pyplot(fig, use_container_width=True)
-        create_download_button(fig, "regression_to_mean.png")
+        create_download_button(fig, "regression_to_mean.png",
+                               cache_key=(mu_reg, sigma_reg, n_subjects, threshold_percentile, fast_render),
+                               draw=draw)
 
         diff = best_mean_test1 - best_mean_test2
         pct_diff = (diff / best_mean_test1) * 100 if best_mean_test1 != 0 else 0
@@ -1,14 +1,45 @@
 import streamlit as st
 import numpy as np
-import matplotlib.pyplot as plt
-from .utils import safe_statistics, create_download_button
+from functools import partial
+from .utils import (safe_statistics, create_download_button, session_figure, generate_sample_batch, dist_rng,
+                    mark_tab_visited, RNG_SEED)
 
 
+@st.cache_data(max_entries=64, show_spinner=False)
+def simulate_small_sample_means(dist_small: str, n_small: int, num_sim: int) -> np.ndarray:
+    """Средние num_sim малых выборок одной матрицей (num_sim, n_small) с фиксированным зерном"""
+    # Сдвиг зерна на 1000: поток не совпадает с выборками ЦПТ тех же размеров
+    rng = dist_rng(RNG_SEED + 1000, dist_small)
+    return generate_sample_batch(dist_small, (num_sim, n_small), rng=rng).mean(axis=1)
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def small_sample_summary(dist_small: str, n_small: int, num_sim: int, bins: int = 20):
+    """Гистограмма плотности и статистики выборочных средних одним кэшированным вызовом"""
+    means = simulate_small_sample_means(dist_small, n_small, num_sim)
+    counts, edges = np.histogram(means, bins=bins, density=True)
+    return counts, edges, safe_statistics(means)
+
+
+def plot_small_sample_means(ax, counts: np.ndarray, bin_edges: np.ndarray, emp_mean: float,
+                            n_small: int, num_sim: int):
+    """Гистограмма плотности выборочных средних и их эмпирическое среднее"""
+    ax.bar(bin_edges[:-1], counts, width=np.diff(bin_edges), align='edge',
+           alpha=0.7, edgecolor='black', color='lightcoral')
+    ax.axvline(emp_mean, color='green', linestyle='--', linewidth=2,
+              label=f'Эмпирическое среднее: {emp_mean:.3f}')
+
+    ax.set_title(f"Закон малых выборок (n={n_small}, симуляций={num_sim})", fontsize=14)
+    ax.set_xlabel("Среднее значение")
+    ax.set_ylabel("Плотность")
+    ax.legend()
+    ax.grid(True, alpha=0.3)
+
+
+@st.fragment
 def small_samples_tab():
     """Вкладка закона малых выборок"""
-    if "visited_tabs" not in st.session_state:
-        st.session_state.visited_tabs = set()
-    st.session_state.visited_tabs.add("Малые выборки")
+    mark_tab_visited("Малые выборки")
 
     st.header("Закон малых выборок")
     st.markdown(
@@ -25,44 +56,17 @@ def small_samples_tab():
     with col3:
         num_sim = st.slider("Количество симуляций", 100, 2000, 500, step=100)
 
-    means_small = []
-    for i in range(num_sim):
-        np.random.seed(i + 1000)
-        if dist_small == "Нормальное":
-            sample = np.random.normal(0, 1, n_small)
-        elif dist_small == "Равномерное":
-            sample = np.random.uniform(0, 1, n_small)
-        elif dist_small == "Экспоненциальное":
-            sample = np.random.exponential(1, n_small)
-        elif dist_small == "Бимодальное":
-            half = n_small // 2
-            sample = np.concatenate([
-                np.random.normal(-2, 1, half),
-                np.random.normal(2, 1, n_small - half)
-            ])
-        means_small.append(np.mean(sample))
-
-    means_small = np.array(means_small)
-
-    fig, ax = plt.subplots(figsize=(12, 6))
-    ax.hist(means_small, bins=20, density=True, alpha=0.7, edgecolor='black', color='lightcoral')
-
-    emp_mean = np.mean(means_small)
-    ax.axvline(emp_mean, color='green', linestyle='--', linewidth=2,
-              label=f'Эмпирическое среднее: {emp_mean:.3f}')
+    counts, bin_edges, stats_dict = small_sample_summary(dist_small, n_small, num_sim)
 
-    ax.set_title(f"Закон малых выборок (n={n_small}, симуляций={num_sim})", fontsize=14)
-    ax.set_xlabel("Среднее значение")
-    ax.set_ylabel("Плотность")
-    ax.legend()
-    ax.grid(True, alpha=0.3)
+    fig, ax = session_figure("small_samples", (12, 6))
+    draw = partial(plot_small_sample_means, counts=counts, bin_edges=bin_edges,
+                   emp_mean=stats_dict['mean'], n_small=n_small, num_sim=num_sim)
+    draw(ax)
 
-    fig.tight_layout()
     st.pyplot(fig, use_container_width=True)
 
-    create_download_button(fig, "small_law.png")
+    create_download_button(fig, "small_law.png", cache_key=(dist_small, n_small, num_sim), draw=draw)
 
-    stats_dict = safe_statistics(means_small)
     st.markdown(
         f"""
     **Результаты анализа**
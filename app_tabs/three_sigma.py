@@ -1,14 +1,70 @@
 import streamlit as st
 import numpy as np
-import matplotlib.pyplot as plt
-from .utils import generate_distribution_data, create_download_button
+from functools import partial
+from matplotlib.collections import LineCollection, PolyCollection
+from matplotlib.font_manager import FontProperties
+from matplotlib.patches import Patch
+from .utils import generate_distribution_data, create_download_button, session_figure, mark_tab_visited, RNG_SEED
+
+# Шрифт подписей разрешается один раз при импорте, а не в каждом ax.annotate
+_ANNOTATION_FONT = FontProperties(size=9)
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def three_sigma_histogram(mu: int, sigma: int, size: int, bins: int = 50):
+    """Плотность гистограммы нормальной выборки: np.histogram считается один раз на набор параметров"""
+    data = generate_distribution_data("Нормальное", size, seed=RNG_SEED, mu=mu, sigma=sigma)
+    # Диапазон известен аналитически (μ ± 4σ), бины равные: номер бина считается арифметически,
+    # а подсчёт идёт через np.bincount. Индексы сдвинуты на 1, чтобы крайние ячейки собрали выбросы
+    lo, width = mu - 4 * sigma, 8 * sigma / bins
+    idx = ((data - lo) * (1 / width) + 1).astype(np.intp)
+    np.clip(idx, 0, bins + 1, out=idx)
+    counts = np.bincount(idx, minlength=bins + 2)[1:-1]
+    edges = lo + width * np.arange(bins + 1)
+    return counts / (counts.sum() * width), edges
+
+
+def plot_three_sigma(ax, counts: np.ndarray, bin_edges: np.ndarray, mu: int, sigma: int):
+    """Гистограмма плотности с полосами и границами ±kσ и подписями"""
+    # Столбцы без обводки: одна заливка-ступенька вместо 50 прямоугольников
+    ax.stairs(counts, bin_edges, fill=True, color='lightgray', alpha=0.7)
 
+    colors = ['#b2df8a', '#fdbf6f', '#fb9a99']
+    labels = ['±1σ (68%)', '±2σ (95%)', '±3σ (99.7%)']
+    # Полосы и границы ±kσ — по одной коллекции; по y они занимают всю высоту осей, как axvspan/axvline
+    bounds = [(mu - i * sigma, mu + i * sigma) for i in (3, 2, 1)]
+    bands = PolyCollection([[(lo, 0), (lo, 1), (hi, 1), (hi, 0)] for lo, hi in bounds],
+                           facecolors=colors[::-1], alpha=0.3, transform=ax.get_xaxis_transform())
+    edges = LineCollection([[(x, 0), (x, 1)] for bound in bounds for x in bound],
+                           colors='red', linestyles='--', linewidths=1, transform=ax.get_xaxis_transform())
+    ax.add_collection(bands, autolim=False)
+    ax.add_collection(edges, autolim=False)
+    ax.update_datalim([(mu - 3 * sigma, 0), (mu + 3 * sigma, 0)], updatey=False)
+    ax.autoscale_view()
+    legend_handles = [Patch(facecolor=color, alpha=0.3, label=label) for color, label in zip(colors, labels)]
+
+    ymax = counts.max() * (1 + ax.margins()[1])
+    annotations = [
+        ("68% значений\n(±1σ)", (mu, ymax * 0.9), (0, -40)),
+        ("95% значений\n(±2σ)", (mu - 2 * sigma, ymax * 0.6), (-40, -10)),
+        ("Почти все значения\nв пределах ±3σ", (mu + 2.5 * sigma, ymax * 0.6), (40, -10))
+    ]
 
+    for text, xy, xytext in annotations:
+        ax.annotate(text, xy=xy, xycoords='data', xytext=xytext,
+                    textcoords='offset points', ha='center', va='top',
+                    arrowprops=dict(arrowstyle='->', color='black'), fontproperties=_ANNOTATION_FONT)
+
+    ax.set_title(f"Закон трёх сигм (μ = {mu}, σ = {sigma})", fontsize=14)
+    ax.set_xlabel("Значение")
+    ax.set_ylabel("Плотность вероятности")
+    ax.legend(handles=legend_handles)
+
+
+@st.fragment
 def three_sigma_law_tab():
     """Вкладка закона трёх сигм"""
-    if "visited_tabs" not in st.session_state:
-        st.session_state.visited_tabs = set()
-    st.session_state.visited_tabs.add("Закон трёх сигм")
+    mark_tab_visited("Закон трёх сигм")
 
     st.header("Закон трёх сигм (эмпирическое правило)")
     st.markdown(
@@ -24,39 +80,15 @@ def three_sigma_law_tab():
     with col3:
         size = st.slider("Размер выборки", 1000, 50000, 10000, step=1000)
 
-    data = generate_distribution_data("Нормальное", size, mu=mu, sigma=sigma)
-
-    fig, ax = plt.subplots(figsize=(12, 6))
-    ax.hist(data, bins=50, density=True, color='lightgray', edgecolor='black', alpha=0.7)
+    counts, bin_edges = three_sigma_histogram(mu, sigma, size)
 
-    colors = ['#b2df8a', '#fdbf6f', '#fb9a99']
-    labels = ['±1σ (68%)', '±2σ (95%)', '±3σ (99.7%)']
-    for i, (color, label) in enumerate(zip(colors, labels), 1):
-        ax.axvspan(mu - i * sigma, mu + i * sigma, color=color, alpha=0.3, label=label)
-        ax.axvline(mu - i * sigma, color='red', linestyle='--', linewidth=1)
-        ax.axvline(mu + i * sigma, color='red', linestyle='--', linewidth=1)
-
-    ymax = ax.get_ylim()[1]
-    annotations = [
-        ("68% значений\n(±1σ)", (mu, ymax * 0.9), (0, -40)),
-        ("95% значений\n(±2σ)", (mu - 2 * sigma, ymax * 0.6), (-40, -10)),
-        ("Почти все значения\nв пределах ±3σ", (mu + 2.5 * sigma, ymax * 0.6), (40, -10))
-    ]
-
-    for text, xy, xytext in annotations:
-        ax.annotate(text, xy=xy, xycoords='data', xytext=xytext,
-                    textcoords='offset points', ha='center', va='top',
-                    arrowprops=dict(arrowstyle='->', color='black'), fontsize=9)
-
-    ax.set_title(f"Закон трёх сигм (μ = {mu}, σ = {sigma})", fontsize=14)
-    ax.set_xlabel("Значение")
-    ax.set_ylabel("Плотность вероятности")
-    ax.legend()
+    fig, ax = session_figure("three_sigma", (12, 6))
+    draw = partial(plot_three_sigma, counts=counts, bin_edges=bin_edges, mu=mu, sigma=sigma)
+    draw(ax)
 
-    fig.tight_layout()
     st.pyplot(fig, use_container_width=True)
 
-    create_download_button(fig, "three_sigma.png")
+    create_download_button(fig, "three_sigma.png", cache_key=(mu, sigma, size), draw=draw)
 
     st.markdown(
         f"""
@@ -1,77 +1,326 @@
 import streamlit as st
 import numpy as np
-import matplotlib.pyplot as plt
-from scipy import stats
+from matplotlib.figure import Figure
 from io import BytesIO
-from typing import Tuple, List, Dict, Any
+from functools import partial
+from typing import Tuple, List, Dict, Any, Optional, Sequence, Union, Callable
+
+try:
+    import numba
+except ImportError:  # Numba необязателен и не входит в requirements.txt: без него используются NumPy-реализации
+    numba = None
+
+
+def make_rng(seed: Union[int, Sequence[int], None] = None) -> np.random.Generator:
+    """Генератор на битовом генераторе SFC64: 64 бита за шаг, быстрее MT19937/PCG64 на массовых выборках"""
+    return np.random.Generator(np.random.SFC64(seed))
+
+
+# Фиксированное зерно генераторов приложения: демонстрации воспроизводимы между перезапусками
+RNG_SEED = 0
+
+# Один генератор на процесс: без повторной инициализации состояния при каждом вызове
+_RNG = make_rng(RNG_SEED)
+
+
+# Размер общего пула стандартных нормальных величин: максимум слайдеров выборки
+_NORMAL_POOL_SIZE = 50000
+
 
 # --- Кэшированные функции для генерации данных ---
-@st.cache_data
-def generate_distribution_data(dist_type: str, size: int, **params) -> np.ndarray:
-    """Универсальная функция для генерации данных различных распределений с кэшированием"""
-    distributions = {
-        "Нормальное": lambda: np.random.normal(params.get('mu', 0), params.get('sigma', 1), size),
-        "Равномерное": lambda: np.random.uniform(params.get('a', 0), params.get('b', 1), size),
-        "Экспоненциальное": lambda: np.random.exponential(params.get('scale', 1), size),
-        "Бимодальное": lambda: generate_bimodal_data(size, params.get('mu1', -2), params.get('mu2', 2),
-                                                   params.get('sigma1', 1), params.get('sigma2', 1)),
-        "Биномиальное": lambda: np.random.binomial(params.get('n', 20), params.get('p', 0.5), size),
-        "Пуассона": lambda: np.random.poisson(params.get('lam', 5), size)
-    }
-    return distributions.get(dist_type, distributions["Нормальное"])()
+@st.cache_data(max_entries=4, show_spinner=False)
+def standard_normal_pool(seed: int) -> np.ndarray:
+    """Общий для вкладок пул N(0, 1) с заданным зерном: нормальные выборки — его префиксы"""
+    return make_rng(seed).standard_normal(_NORMAL_POOL_SIZE, dtype=np.float32)
+
+
+def _standard_normal(rng: np.random.Generator, size: int, seed: Optional[int]) -> np.ndarray:
+    """N(0, 1) из пула (при заданном зерне) или из генератора"""
+    if seed is not None and size <= _NORMAL_POOL_SIZE:
+        return standard_normal_pool(seed)[:size]
+    return rng.standard_normal(size, dtype=np.float32)
+
+
+def _draw_normal(rng, size, seed, params):
+    return _standard_normal(rng, size, seed) * params.get('sigma', 1) + params.get('mu', 0)
+
+
+def _draw_uniform(rng, size, seed, params):
+    a = params.get('a', 0)
+    return rng.random(size, dtype=np.float32) * (params.get('b', 1) - a) + a
+
+
+def _draw_exponential(rng, size, seed, params):
+    return rng.standard_exponential(size, dtype=np.float32) * params.get('scale', 1)
+
+
+def _draw_bimodal(rng, size, seed, params):
+    return generate_bimodal_data(size, params.get('mu1', -2), params.get('mu2', 2),
+                                 params.get('sigma1', 1), params.get('sigma2', 1), rng=rng)
+
+
+def _draw_binomial(rng, size, seed, params):
+    return rng.binomial(params.get('n', 20), params.get('p', 0.5), size)
+
+
+def _draw_poisson(rng, size, seed, params):
+    return rng.poisson(params.get('lam', 5), size)
+
+
+# Таблица диспетчеризации строится один раз при импорте, а не набором лямбд при каждом вызове
+_DIST_DRAWERS = {
+    "Нормальное": _draw_normal,
+    "Равномерное": _draw_uniform,
+    "Экспоненциальное": _draw_exponential,
+    "Бимодальное": _draw_bimodal,
+    "Биномиальное": _draw_binomial,
+    "Пуассона": _draw_poisson,
+}
+
+# Номер потока для каждого распределения: при одном зерне их выборки не совпадают
+_DIST_STREAMS = {name: i for i, name in enumerate(_DIST_DRAWERS)}
+
+
+def dist_rng(seed: int, dist_type: str) -> np.random.Generator:
+    """Генератор с зерном, свой для каждого распределения (SeedSequence из пары зерно, номер потока)"""
+    return make_rng((seed, _DIST_STREAMS.get(dist_type, 0)))
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def generate_distribution_data(dist_type: str, size: int, seed: Optional[int] = None, **params) -> np.ndarray:
+    """Универсальная функция для генерации данных различных распределений с кэшированием.
+
+    С seed данные детерминированы параметрами и не меняются при вытеснении из кэша;
+    нормальные выборки при этом берутся из общего пула и отличаются только сдвигом и масштабом.
+    """
+    rng = _RNG if seed is None else dist_rng(seed, dist_type)
+    draw = _DIST_DRAWERS.get(dist_type, _draw_normal)
+    # Данные используются только для визуализации: непрерывные распределения сразу генерируются
+    # во float32 (вдвое меньше памяти), дискретные приводятся к нему
+    return draw(rng, size, seed, params).astype(np.float32, copy=False)
 
 
 def generate_bimodal_data(size: int, mu1: float = -2, mu2: float = 2,
-                         sigma1: float = 1, sigma2: float = 1) -> np.ndarray:
+                         sigma1: float = 1, sigma2: float = 1,
+                         rng: Optional[np.random.Generator] = None) -> np.ndarray:
     """Генерация бимодального распределения"""
+    rng = _RNG if rng is None else rng
     half = size // 2
-    return np.concatenate([
-        np.random.normal(mu1, sigma1, half),
-        np.random.normal(mu2, sigma2, size - half)
-    ])
-
-
-@st.cache_data
-def calculate_sample_means(dist_type: str, sample_size: int, num_samples: int) -> np.ndarray:
-    """Кэшированное вычисление выборочных средних для ЦПТ"""
-    means = []
-    for _ in range(num_samples):
-        if dist_type == "Равномерное":
-            sample = np.random.uniform(0, 1, sample_size)
-        elif dist_type == "Экспоненциальное":
-            sample = np.random.exponential(1.0, sample_size)
-        elif dist_type == "Бимодальное":
-            h = sample_size // 2
-            sample = np.concatenate([np.random.normal(-2, 1, h), np.random.normal(2, 1, sample_size-h)])
-        else:  # Нормальное
-            sample = np.random.normal(0, 1, sample_size)
-        means.append(np.mean(sample))
-    return np.array(means)
-
-
-@st.cache_data
+    # Один массив: обе половины масштабируются и сдвигаются на месте, без np.concatenate
+    out = rng.standard_normal(size, dtype=np.float32)
+    out[:half] *= sigma1
+    out[:half] += mu1
+    out[half:] *= sigma2
+    out[half:] += mu2
+    return out
+
+
+def generate_sample_batch(dist_type: str, shape: Tuple[int, int],
+                          rng: Optional[np.random.Generator] = None) -> np.ndarray:
+    """Матрица выборок (num_samples, sample_size) за один вызов генератора.
+
+    Для бимодального распределения моды чередуются по столбцам, поэтому любой
+    префикс из n столбцов содержит n // 2 значений из моды -2 и остальные из моды 2.
+    По умолчанию используется общий генератор модуля; rng позволяет передать свой (с зерном).
+    """
+    rng = _RNG if rng is None else rng
+    if dist_type == "Равномерное":
+        return rng.random(shape, dtype=np.float32)
+    if dist_type == "Экспоненциальное":
+        return rng.standard_exponential(shape, dtype=np.float32)
+    if dist_type == "Бимодальное":
+        # Один вызов генератора и сдвиг на месте: без промежуточных массивов и конкатенации
+        samples = rng.standard_normal(shape, dtype=np.float32)
+        samples[:, 1::2] -= 2
+        samples[:, 0::2] += 2
+        return samples
+    return rng.standard_normal(shape, dtype=np.float32)  # Нормальное
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def calculate_sample_means(dist_type: str, sample_size: int, num_samples: int,
+                           seed: Optional[int] = None) -> np.ndarray:
+    """Кэшированное вычисление выборочных средних для ЦПТ одной матрицей (num_samples, sample_size)"""
+    rng = None if seed is None else dist_rng(seed, dist_type)
+    samples = generate_sample_batch(dist_type, (num_samples, sample_size), rng=rng)
+    return samples.mean(axis=1).astype(np.float32, copy=False)
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def calculate_sample_means_progressive(dist_type: str, num_samples: int,
+                                       sizes: Tuple[int, ...], seed: Optional[int] = None) -> Dict[int, np.ndarray]:
+    """Выборочные средние сразу для нескольких размеров выборки из одной матрицы max(sizes) столбцов"""
+    rng = None if seed is None else dist_rng(seed, dist_type)
+    raw = generate_sample_batch(dist_type, (num_samples, max(sizes)), rng=rng)
+    return {n: raw[:, :n].mean(axis=1).astype(np.float32, copy=False) for n in sizes}
+
+
+if numba is not None:
+    @numba.njit(cache=True, fastmath=True)
+    def _running_mean_jit(x):
+        out = np.empty(x.size, np.float64)  # как и у NumPy-версии: накопление и результат во float64
+        s = 0.0
+        for i in range(x.size):
+            s += x[i]
+            out[i] = s / (i + 1)
+        return out
+else:
+    _running_mean_jit = None
+
+
+# Делители 1..n для накопленного среднего, до максимума слайдера ЗБЧ: создаются один раз
+_DENOM = np.arange(1, 20001, dtype=np.float64)
+
+
+def running_mean(x: np.ndarray) -> np.ndarray:
+    """Накопленное среднее за один проход (Numba) или через cumsum (NumPy)"""
+    if _running_mean_jit is not None:
+        return _running_mean_jit(x)
+    n = len(x)
+    out = np.cumsum(x, dtype=np.float64)
+    out /= _DENOM[:n] if n <= len(_DENOM) else np.arange(1, n + 1, dtype=np.float64)
+    return out
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
 def safe_statistics(data: np.ndarray) -> Dict[str, float]:
     """Безопасное вычисление статистик с обработкой ошибок"""
     try:
+        # Моменты считаются от одного отклонения d: без обёрток scipy.stats
+        mean = data.mean(dtype=np.float64)
+        d = data - mean
+        d2 = d * d
+        var = d2.mean()
+        skew = kurt = np.nan
+        if len(data) > 2 and var > 0:
+            skew = (d2 * d).mean() / var ** 1.5
+            kurt = (d2 * d2).mean() / (var * var) - 3.0
         return {
-            'mean': np.mean(data),
+            'mean': mean,
             'median': np.median(data),
-            'std': np.std(data),
+            'std': np.sqrt(var),
             'min': np.min(data),
             'max': np.max(data),
-            'skewness': stats.skew(data) if len(data) > 2 else np.nan,
-            'kurtosis': stats.kurtosis(data) if len(data) > 2 else np.nan
+            'skewness': skew,
+            'kurtosis': kurt
         }
     except Exception as e:
         st.warning(f"Ошибка при вычислении статистик: {str(e)}")
         return {key: np.nan for key in ['mean', 'median', 'std', 'min', 'max', 'skewness', 'kurtosis']}
 
 
-def create_download_button(fig, filename: str, label: str = "📥 Скачать график (PNG)"):
-    """Универсальная функция для создания кнопки скачивания графика"""
+# Фиксированные поля вместо fig.tight_layout(): без измерения текста на каждом перезапуске
+SUBPLOT_ADJUST = dict(left=0.08, right=0.98, top=0.92, bottom=0.12)
+
+
+def new_figure(figsize: Tuple[float, float], **adjust):
+    """Фигура вне глобального реестра pyplot: освобождается сборщиком мусора без plt.close"""
+    fig = Figure(figsize=figsize)
+    fig.subplots_adjust(**{**SUBPLOT_ADJUST, **adjust})
+    return fig, fig.subplots()
+
+
+def session_figure(key: str, figsize: Tuple[float, float], **adjust):
+    """Фигура, переиспользуемая между перезапусками в рамках сессии: оси очищаются, а не создаются заново"""
+    figures = st.session_state.setdefault("_figures", {})
+    if key not in figures:
+        figures[key] = new_figure(figsize, **adjust)
+    fig, ax = figures[key]
+    ax.clear()
+    return fig, ax
+
+
+def hist_with_kde(ax, data: np.ndarray, bins: int = 30, kde: bool = True, **kwargs) -> Tuple[np.ndarray, np.ndarray]:
+    """Гистограмма частот (np.histogram + одна ступенчатая фигура) с наложенной KDE-кривой"""
+    kwargs.setdefault('edgecolor', 'black')
+    counts, edges = np.histogram(data, bins=bins)
+    ax.stairs(counts, edges, fill=True, **kwargs)
+    if kde and len(data) > 1 and np.ptp(data) > 0:
+        xs, density = fast_kde(data)
+        # Плотность масштабируется к частотам: n * ширина бина
+        ax.plot(xs, density * len(data) * (edges[1] - edges[0]), color=kwargs.get('color'), linewidth=2)
+    return counts, edges
+
+
+def fast_kde(data: np.ndarray, gridsize: int = 256) -> Tuple[np.ndarray, np.ndarray]:
+    """Быстрая KDE: гистограмма на мелкой сетке, сглаженная гауссовым фильтром, O(n + gridsize)"""
+    from scipy.ndimage import gaussian_filter1d
+    counts, edges = np.histogram(data, bins=gridsize)
+    step = edges[1] - edges[0]
+    bandwidth = 1.06 * np.std(data) * len(data) ** -0.2  # правило Сильвермана
+    smooth = gaussian_filter1d(counts.astype(np.float64), bandwidth / step, mode='constant')
+    centers = 0.5 * (edges[1:] + edges[:-1])
+    return centers, smooth / (smooth.sum() * step)
+
+
+def _render_png(fig, dpi: int = 150) -> bytes:
+    """Кодирование фигуры в PNG"""
     buf = BytesIO()
-    fig.savefig(buf, format="png", dpi=300, bbox_inches='tight')
-    return st.download_button(label, buf.getvalue(), filename, "image/png")
+    fig.savefig(buf, format="png", dpi=dpi)  # поля заданы SUBPLOT_ADJUST при создании фигуры
+    return buf.getvalue()
+
+
+def _render_redrawn_png(figsize: Tuple[float, float], adjust: Dict[str, float],
+                        draw: Callable, dpi: int = 150) -> bytes:
+    """PNG свежей фигуры, заново нарисованной функцией draw(ax) по данным графика"""
+    fig, ax = new_figure(figsize, **adjust)
+    draw(ax)
+    return _render_png(fig, dpi)
+
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def _cached_png(cache_key: Tuple, dpi: int, _render: Callable) -> bytes:
+    """PNG, кэшированный по параметрам графика (функция кодирования в ключ не входит)"""
+    return _render(dpi)
+
+
+def create_download_button(fig, filename: str, label: str = "📥 Скачать график (PNG)",
+                           cache_key: Optional[Tuple] = None, draw: Optional[Callable] = None):
+    """Универсальная функция для создания кнопки скачивания графика.
+
+    cache_key — кортеж параметров, однозначно определяющих график: при повторном
+    запуске с теми же параметрами PNG берётся из кэша без повторной растеризации.
+    По умолчанию PNG сохраняется в 150 DPI, 300 DPI — по флажку высокого разрешения.
+    Кодирование откладывается до нажатия кнопки.
+
+    draw(ax) обязателен для фигур из session_figure: их перерисовывает следующий перезапуск,
+    поэтому PNG строится на свежей фигуре того же размера и с теми же полями, а не на fig.
+    """
+    hi_res = st.checkbox("Высокое разрешение (300 DPI)", key=f"hi_res_{filename}")
+    dpi = 300 if hi_res else 150
+    if draw is None:
+        render = partial(_render_png, fig)
+    else:
+        # Размер и поля копируются сейчас: поток скачивания не обращается к фигуре сессии
+        pars = fig.subplotpars
+        adjust = dict(left=pars.left, right=pars.right, top=pars.top, bottom=pars.bottom)
+        render = partial(_render_redrawn_png, tuple(fig.get_size_inches()), adjust, draw)
+    if cache_key is None:
+        data = partial(render, dpi)
+    else:
+        data = partial(_cached_png, (filename,) + tuple(cache_key), dpi, render)
+    # PNG кодируется только по нажатию и в отдельном потоке; on_click="ignore" не запускает
+    # перерисовку страницы при скачивании
+    return st.download_button(label, data, filename, "image/png", on_click="ignore")
+
+
+_TAB_BITS = {
+    name: 1 << i for i, name in enumerate((
+        "Закон трёх сигм", "ЦПТ", "ЗБЧ", "Малые выборки",
+        "Сравнение распределений", "Регрессия к среднему",
+        "Проверь свои знания", "Типы распределений"
+    ))
+}
+
+
+def mark_tab_visited(name: str):
+    """Отметка посещённой вкладки: один бит в целочисленной маске session_state"""
+    st.session_state.visited_tabs = st.session_state.get("visited_tabs", 0) | _TAB_BITS[name]
+
+
+def visited_tabs_count() -> Tuple[int, int]:
+    """Число посещённых вкладок и общее число вкладок"""
+    return bin(st.session_state.get("visited_tabs", 0)).count("1"), len(_TAB_BITS)
 
 
 def format_stat_display(stats_dict: Dict[str, float], title: str):